@@ -105,8 +105,8 @@ class ChatAgent:
     def _initialize_chain(self):
         """Initialize the conversation chain with the vector store."""
         try:
-            vectorstore = self.doc_processor.query_documents("", k=1)
-            if vectorstore and len(vectorstore) > 0:  # Only initialize if we have documents
+            if self.doc_processor.has_documents():  # Only initialize if we have documents
+                vectorstore = self.doc_processor.get_vectorstore()
                 self.conversation = ConversationalRetrievalChain.from_llm(
                     llm=self.llm,
                     retriever=vectorstore.as_retriever(),
@@ -121,6 +121,11 @@ class ChatAgent:
             logging.warning(f"Error initializing conversation chain: {str(e)}")
             self.conversation = None
     
+    def refresh_chain(self):
+        """Build the conversation chain once documents have been ingested elsewhere."""
+        if self.conversation is None:
+            self._initialize_chain()
+    
     def process_message(self, message: str) -> Dict[str, Any]:
         """Process a user message and return a response."""
         try:
@@ -153,7 +158,9 @@ class ChatAgent:
     def add_documents(self, documents: List[Any]):
         """Add new documents to the knowledge base."""
         try:
-            vectorstore = self.doc_processor.process_documents(documents)
+            self.doc_processor.process_documents(documents)
+            # Retrieve through the processor's store so queries use the shared cache
+            vectorstore = self.doc_processor.get_vectorstore()
             self.conversation = ConversationalRetrievalChain.from_llm(
                 llm=self.llm,
                 retriever=vectorstore.as_retriever(),
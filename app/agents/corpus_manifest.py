@@ -0,0 +1,182 @@
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class CorpusManifest:
+    """JSON manifest of the sources stored in a vector store.
+
+    Keeps per-source chunk counts, chunk text sizes and ingest timestamps
+    alongside running totals, so statistics and existence checks never have to
+    touch the embedding model or the index. The file is re-read only when another
+    instance has rewritten it.
+    """
+
+    def __init__(self, path: str, embedding_model: str):
+        """Load the manifest at ``path``, if present."""
+        self.path = path
+        self.embedding_model = embedding_model
+        self._lock = threading.RLock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._stored_model: Optional[str] = None
+        self._total_chunks = 0
+        self._total_chunk_bytes = 0
+        self._refresh()
+
+    def exists(self) -> bool:
+        """Whether the manifest has been written to disk."""
+        return os.path.exists(self.path)
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Inode, modification time and size of the manifest file.
+        
+        Every save replaces the file with a new inode and a strictly later
+        modification time, so rewrites are detected even when they fall in
+        one timestamp tick and keep the same size.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self) -> None:
+        """Reload the manifest if the file changed since it was last read."""
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature:
+                return
+            data: Dict[str, Any] = {}
+            if signature is not None:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Error reading corpus manifest {self.path}: {str(e)}")
+            self._load(data)
+            self._signature = signature
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        """Replace the in-memory state and recompute the totals."""
+        self._sources = data.get("sources", {})
+        for entry in self._sources.values():
+            # Manifests written before the field was renamed
+            if "bytes" in entry:
+                entry["chunk_bytes"] = entry.pop("bytes")
+        self._stored_model = data.get("embedding_model")
+        self._total_chunks = sum(entry["chunks"] for entry in self._sources.values())
+        self._total_chunk_bytes = sum(entry["chunk_bytes"] for entry in self._sources.values())
+        if self._stored_model and self._stored_model != self.embedding_model:
+            logging.warning(
+                f"Corpus was embedded with {self._stored_model}, "
+                f"but {self.embedding_model} is configured"
+            )
+
+    def _save(self) -> None:
+        """Atomically write the manifest to disk."""
+        data = {
+            "embedding_model": self._stored_model or self.embedding_model,
+            "updated_at": datetime.now().isoformat(),
+            "sources": self._sources,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        # Inode numbers can be reused, so also keep modification times increasing
+        mtime = time.time_ns()
+        current = self._file_signature()
+        if current is not None:
+            mtime = max(mtime, current[1] + 1)
+        os.utime(tmp_path, ns=(mtime, mtime))
+        os.replace(tmp_path, self.path)
+        self._signature = self._file_signature()
+
+    @staticmethod
+    def _count(documents: List[Any]) -> Dict[str, Tuple[int, int]]:
+        """Chunk counts and UTF-8 chunk text sizes of ``documents`` per source.
+        
+        Chunks overlap, so the text size is larger than the source itself.
+        """
+        counts: Dict[str, Tuple[int, int]] = {}
+        for doc in documents:
+            source = doc.metadata.get("source", "Unknown source")
+            chunks, num_bytes = counts.get(source, (0, 0))
+            counts[source] = (chunks + 1, num_bytes + len(doc.page_content.encode("utf-8")))
+        return counts
+
+    def record_ingest(self, documents: List[Any]) -> None:
+        """Add the chunks in ``documents`` to their sources' entries."""
+        counts = self._count(documents)
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._refresh()
+            for source, (chunks, num_bytes) in counts.items():
+                entry = self._sources.setdefault(
+                    source, {"chunks": 0, "chunk_bytes": 0, "first_ingested_at": now}
+                )
+                entry["chunks"] += chunks
+                entry["chunk_bytes"] += num_bytes
+                entry["last_ingested_at"] = now
+                self._total_chunks += chunks
+                self._total_chunk_bytes += num_bytes
+            self._stored_model = self._stored_model or self.embedding_model
+            self._save()
+
+    def remove_source(self, source: str) -> bool:
+        """Drop a source from the manifest."""
+        with self._lock:
+            self._refresh()
+            entry = self._sources.pop(source, None)
+            if entry is None:
+                return False
+            self._total_chunks -= entry["chunks"]
+            self._total_chunk_bytes -= entry["chunk_bytes"]
+            self._save()
+            return True
+
+    def rebuild(self, documents: List[Any], embedding_model: Optional[str] = None) -> None:
+        """Replace the manifest with entries computed from ``documents`` in one save."""
+        now = datetime.now().isoformat()
+        sources = {
+            source: {
+                "chunks": chunks,
+                "chunk_bytes": num_bytes,
+                "first_ingested_at": now,
+                "last_ingested_at": now,
+            }
+            for source, (chunks, num_bytes) in self._count(documents).items()
+        }
+        with self._lock:
+            self._load({
+                "embedding_model": embedding_model or self.embedding_model,
+                "sources": sources,
+            })
+            self._save()
+
+    def has_documents(self) -> bool:
+        """Whether any chunks are stored."""
+        self._refresh()
+        return self._total_chunks > 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Corpus-wide totals."""
+        with self._lock:
+            self._refresh()
+            return {
+                "sources": len(self._sources),
+                "chunks": self._total_chunks,
+                "chunk_bytes": self._total_chunk_bytes,
+                "embedding_model": self._stored_model or self.embedding_model,
+            }
+
+    def sources(self) -> List[Dict[str, Any]]:
+        """Per-source entries, most recently ingested first."""
+        with self._lock:
+            self._refresh()
+            entries = [{"source": source, **entry} for source, entry in self._sources.items()]
+        return sorted(entries, key=lambda entry: entry["last_ingested_at"], reverse=True)
@@ -1,31 +1,75 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
 from langchain_community.document_loaders import (
     PyPDFLoader,
     TextLoader,
     UnstructuredWordDocumentLoader,
     UnstructuredFileLoader,
 )
+from langchain.schema import Document
+from .corpus_manifest import CorpusManifest
+from .query_embedding import QueryEmbedder, shared_query_embedder
+from .vector_snapshot import store_lock, check_compatible, export_collection, import_collection
+import markdown
 import os
+import pandas as pd
 import tempfile
 
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings that route query embedding through a shared QueryEmbedder."""
+    
+    def __init__(self, embeddings: Embeddings, query_embedder: QueryEmbedder):
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents with the underlying model."""
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query through the cache and micro-batcher."""
+        return self.query_embedder.embed(text)
+
 class DocumentProcessor:
     def __init__(self, persist_directory: str = "./chroma_db"):
         self.persist_directory = persist_directory
         os.makedirs(self.persist_directory, exist_ok=True)
+        self._write_lock = store_lock(self.persist_directory)
         
+        self.embedding_model = "sentence-transformers/all-mpnet-base-v2"
         self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-mpnet-base-v2"
+            model_name=self.embedding_model
         )
+        # Retrieval embeds queries through a cache shared by every processor
+        self.query_embedder = shared_query_embedder(self.embedding_model, self._embed_queries)
+        self.query_embeddings = CachedQueryEmbeddings(self.embeddings, self.query_embedder)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
         )
         
+        self.manifest = CorpusManifest(
+            os.path.join(self.persist_directory, "corpus_manifest.json"),
+            embedding_model=self.embedding_model
+        )
+        if not self.manifest.exists():
+            try:
+                self.rebuild_manifest()
+            except Exception:
+                # Statistics stay empty until the manifest can be rebuilt
+                pass
+        
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of queries with the same settings as ``embed_query``."""
+        encode_kwargs = self.embeddings.query_encode_kwargs or self.embeddings.encode_kwargs
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.embeddings.client.encode(texts, **encode_kwargs).tolist()
+        
     def load_document(self, file_path: str) -> List[Any]:
         """Load and split a document based on its file type."""
         file_extension = os.path.splitext(file_path)[1].lower()
@@ -64,17 +108,62 @@ class DocumentProcessor:
             logging.error(f"Error loading document {file_path}: {str(e)}", exc_info=True)
             raise
 
-    def process_documents(self, documents: List[Any]) -> Chroma:
-        """Process documents and store them in the vector store."""
+    def load_file(self, file_path: str, source_name: Optional[str] = None) -> List[Any]:
+        """Load an uploaded file, handling tabular and Markdown files directly."""
+        source_name = source_name or os.path.basename(file_path)
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
+        if file_extension in ['.csv', '.xlsx', '.xls']:
+            if file_extension == '.csv':
+                df = pd.read_csv(file_path)
+            else:
+                df = pd.read_excel(file_path)
+            # Convert DataFrame to string representation
+            return [Document(
+                page_content=df.to_string(),
+                metadata={"source": source_name}
+            )]
+        
+        if file_extension == '.md':
+            with open(file_path, encoding='utf-8') as f:
+                # Convert Markdown to plain text while preserving structure
+                content = markdown.markdown(f.read())
+            return [Document(
+                page_content=content,
+                metadata={"source": source_name}
+            )]
+        
+        documents = self.load_document(file_path)
+        for doc in documents:
+            doc.metadata["source"] = source_name
+        return documents
+
+    def process_documents(self, documents: List[Any], ids: Optional[List[str]] = None) -> Chroma:
+        """Process documents and store them in the vector store.
+        
+        Passing stable ``ids`` makes re-adding the same chunks idempotent, in
+        the index and in the corpus manifest.
+        """
         try:
             logging.info(f"Processing {len(documents)} documents")
             
-            # Create a new vector store
-            vectordb = Chroma.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                persist_directory=self.persist_directory
-            )
+            with self._write_lock:
+                # Only chunks that are not stored yet count towards the manifest
+                new_documents = documents
+                if ids:
+                    existing = set(self.get_vectorstore().get(ids=ids, include=[])["ids"])
+                    new_documents = [
+                        doc for doc, doc_id in zip(documents, ids) if doc_id not in existing
+                    ]
+                
+                # Create a new vector store
+                vectordb = Chroma.from_documents(
+                    documents=documents,
+                    embedding=self.embeddings,
+                    ids=ids,
+                    persist_directory=self.persist_directory
+                )
+                self.manifest.record_ingest(new_documents)
             
             logging.info("Successfully processed and stored documents")
             return vectordb
@@ -83,6 +172,88 @@ class DocumentProcessor:
             logging.error(f"Error processing documents: {str(e)}", exc_info=True)
             raise
 
+    def get_vectorstore(self) -> Chroma:
+        """Open the persisted vector store."""
+        return Chroma(
+            persist_directory=self.persist_directory,
+            embedding_function=self.query_embeddings
+        )
+
+    def rebuild_manifest(self) -> None:
+        """Rebuild the corpus manifest from the documents in the vector store."""
+        try:
+            if not os.path.exists(os.path.join(self.persist_directory, "chroma.sqlite3")):
+                self.manifest.rebuild([])
+                return
+            
+            logging.info("Rebuilding corpus manifest from the vector store")
+            stored = self.get_vectorstore().get(include=["metadatas", "documents"])
+            documents = [
+                Document(page_content=text or "", metadata=metadata or {})
+                for text, metadata in zip(stored["documents"], stored["metadatas"])
+            ]
+            # Chroma does not record the embedding model, so assume the configured one
+            self.manifest.rebuild(documents, embedding_model=self.embedding_model)
+            logging.info(f"Corpus manifest rebuilt with {len(documents)} chunks")
+            
+        except Exception as e:
+            logging.error(f"Error rebuilding corpus manifest: {str(e)}", exc_info=True)
+            raise
+
+    def delete_source(self, source: str) -> bool:
+        """Delete every chunk of a source from the vector store."""
+        try:
+            vectordb = self.get_vectorstore()
+            with self._write_lock:
+                ids = vectordb.get(where={"source": source}, include=[])["ids"]
+                if ids:
+                    vectordb.delete(ids=ids)
+                self.manifest.remove_source(source)
+            logging.info(f"Deleted {len(ids)} chunks from source: {source}")
+            return bool(ids)
+            
+        except Exception as e:
+            logging.error(f"Error deleting source {source}: {str(e)}", exc_info=True)
+            return False
+
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """Export a point-in-time snapshot of the vector store to ``path``."""
+        try:
+            with self._write_lock:
+                return export_collection(
+                    self.get_vectorstore()._collection,
+                    path,
+                    extra={"embedding_model": self.embedding_model}
+                )
+        except Exception as e:
+            logging.error(f"Error exporting snapshot to {path}: {str(e)}", exc_info=True)
+            raise
+
+    def import_snapshot(self, path: str) -> int:
+        """Restore a snapshot into the vector store without re-embedding."""
+        try:
+            with self._write_lock:
+                collection = self.get_vectorstore()._collection
+                check_compatible(collection, path, self.embedding_model)
+                imported = import_collection(collection, path)
+                self.rebuild_manifest()
+            return imported
+        except Exception as e:
+            logging.error(f"Error importing snapshot from {path}: {str(e)}", exc_info=True)
+            raise
+
+    def has_documents(self) -> bool:
+        """Check whether any documents are indexed, without querying the index."""
+        return self.manifest.has_documents()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Corpus statistics from the manifest."""
+        return {
+            **self.manifest.stats(),
+            "documents": self.manifest.sources(),
+            "query_cache": self.query_embedder.stats(),
+        }
+
     def query_documents(self, query: str, k: int = 5) -> List[Dict]:
         """Query the vector store for relevant documents."""
         try:
@@ -90,10 +261,7 @@ class DocumentProcessor:
                 logging.warning("No documents have been processed yet")
                 return []
                 
-            vectordb = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings
-            )
+            vectordb = self.get_vectorstore()
             
             results = vectordb.similarity_search_with_relevance_scores(query, k=k)
             return results
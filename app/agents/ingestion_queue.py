@@ -0,0 +1,346 @@
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from contextlib import closing, contextmanager
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    error TEXT,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total_chunks INTEGER,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+
+class IngestionQueue:
+    """SQLite-backed queue that ingests uploaded files in background workers.
+
+    Progress is checkpointed after every file and every batch of chunks, so a
+    job interrupted by a crash or restart resumes where it stopped. Chunk IDs
+    are derived from the job and file position, which makes re-adding a batch
+    that was stored but not yet checkpointed harmless.
+
+    Running jobs record their owning queue and a heartbeat. A running job is
+    only taken over once its heartbeat is older than ``stale_after`` seconds,
+    so several processes can safely share one queue directory.
+    """
+
+    def __init__(
+        self,
+        doc_processor: Any,
+        queue_directory: str = "./ingestion_queue",
+        num_workers: int = 1,
+        batch_size: int = 32,
+        poll_interval: float = 1.0,
+        stale_after: float = 60.0,
+    ):
+        """Initialize the queue database and staging directory."""
+        self.doc_processor = doc_processor
+        self.queue_directory = queue_directory
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.queue_directory, exist_ok=True)
+
+        self.db_path = os.path.join(self.queue_directory, "jobs.sqlite3")
+        self._claim_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._active_jobs: set = set()
+        self._active_jobs_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Queue databases created before heartbeats were recorded
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        logging.info(f"Ingestion queue initialized at {self.db_path}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the queue database, commit on success and close it."""
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _now() -> str:
+        """Current timestamp in ISO format."""
+        return datetime.now().isoformat()
+
+    def start(self) -> None:
+        """Start the background workers and the heartbeat thread."""
+        if any(worker.is_alive() for worker in self._workers):
+            return
+
+        self._stop_event.clear()
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"ingestion-worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        self._workers.append(
+            threading.Thread(target=self._heartbeat_loop, name="ingestion-heartbeat", daemon=True)
+        )
+        for worker in self._workers:
+            worker.start()
+        logging.info(f"Started {self.num_workers} ingestion worker(s)")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal the workers to stop after their current batch."""
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, files: List[Tuple[str, bytes]]) -> str:
+        """Stage uploaded files on disk and enqueue them as a single job."""
+        job_id = uuid.uuid4().hex
+        job_directory = os.path.join(self.queue_directory, job_id)
+        os.makedirs(job_directory, exist_ok=True)
+
+        rows = []
+        for position, (name, data) in enumerate(files):
+            path = os.path.join(job_directory, f"{position}_{os.path.basename(name)}")
+            with open(path, "wb") as f:
+                f.write(data)
+            rows.append((job_id, position, name, path, "pending"))
+
+        now = self._now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO job_files (job_id, position, name, path, status) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        logging.info(f"Queued ingestion job {job_id} with {len(files)} file(s)")
+        return job_id
+
+    def retry(self, job_id: str) -> bool:
+        """Requeue a failed job, keeping the progress of its checkpoints."""
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET status = 'queued', error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'failed'",
+                (self._now(), job_id)
+            ).rowcount
+            if updated:
+                conn.execute(
+                    "UPDATE job_files SET status = 'pending', error = NULL "
+                    "WHERE job_id = ? AND status = 'failed'",
+                    (job_id,)
+                )
+        return bool(updated)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the status of a job and its files."""
+        with self._connect() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            files = conn.execute(
+                "SELECT name, status, total_chunks, chunks_done, error FROM job_files "
+                "WHERE job_id = ? ORDER BY position",
+                (job_id,)
+            ).fetchall()
+        return self._job_status(job, files)
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, newest first."""
+        with self._connect() as conn:
+            job_ids = [
+                row["id"] for row in conn.execute(
+                    "SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                )
+            ]
+        return [job for job in map(self.get_job, job_ids) if job is not None]
+
+    @staticmethod
+    def _job_status(job: sqlite3.Row, files: List[sqlite3.Row]) -> Dict[str, Any]:
+        """Build the status dictionary reported to callers."""
+        file_statuses = [dict(row) for row in files]
+        progress = 0.0
+        for row in file_statuses:
+            if row["status"] == "completed":
+                progress += 1
+            elif row["total_chunks"]:
+                progress += row["chunks_done"] / row["total_chunks"]
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "error": job["error"],
+            "progress": progress / len(file_statuses) if file_statuses else 1.0,
+            "files": file_statuses,
+        }
+
+    def _claim_next(self) -> Optional[str]:
+        """Atomically claim the oldest queued or abandoned job and return its ID.
+
+        A running job counts as abandoned once its owner stopped sending
+        heartbeats, e.g. because the process crashed or was restarted.
+        """
+        now = time.time()
+        with self._claim_lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, status FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)) "
+                "ORDER BY created_at LIMIT 1",
+                (now - self.stale_after,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["status"] == "running":
+                logging.info(f"Taking over abandoned ingestion job {row['id']}")
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ?",
+                (self.owner, now, self._now(), row["id"])
+            )
+        with self._active_jobs_lock:
+            self._active_jobs.add(row["id"])
+        return row["id"]
+
+    def _heartbeat_loop(self) -> None:
+        """Refresh the heartbeat of the jobs this queue is running."""
+        while not self._stop_event.wait(self.stale_after / 4):
+            with self._active_jobs_lock:
+                job_ids = list(self._active_jobs)
+            if not job_ids:
+                continue
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ?",
+                        [(time.time(), job_id, self.owner) for job_id in job_ids]
+                    )
+            except Exception as e:
+                logging.error(f"Error recording ingestion heartbeat: {str(e)}", exc_info=True)
+
+    def _worker_loop(self) -> None:
+        """Process queued jobs until asked to stop."""
+        while not self._stop_event.is_set():
+            try:
+                job_id = self._claim_next()
+            except Exception as e:
+                logging.error(f"Error claiming ingestion job: {str(e)}", exc_info=True)
+                job_id = None
+            if job_id is None:
+                self._stop_event.wait(self.poll_interval)
+                continue
+            try:
+                self._run_job(job_id)
+            except Exception as e:
+                logging.error(f"Error running ingestion job {job_id}: {str(e)}", exc_info=True)
+                try:
+                    self._set_job_status(job_id, "failed", error=str(e))
+                except Exception:
+                    # Without heartbeats the job is taken over once it goes stale
+                    logging.error(f"Could not mark ingestion job {job_id} as failed", exc_info=True)
+            finally:
+                with self._active_jobs_lock:
+                    self._active_jobs.discard(job_id)
+
+    def _run_job(self, job_id: str) -> None:
+        """Ingest the remaining files of a job, checkpointing as it goes."""
+        logging.info(f"Running ingestion job {job_id}")
+        with self._connect() as conn:
+            files = conn.execute(
+                "SELECT * FROM job_files WHERE job_id = ? AND status != 'completed' ORDER BY position",
+                (job_id,)
+            ).fetchall()
+
+        errors = []
+        for file_row in files:
+            if self._stop_event.is_set():
+                self._set_job_status(job_id, "queued")
+                logging.info(f"Ingestion job {job_id} paused for shutdown")
+                return
+            try:
+                if not self._ingest_file(job_id, file_row):
+                    self._set_job_status(job_id, "queued")
+                    logging.info(f"Ingestion job {job_id} paused for shutdown")
+                    return
+            except Exception as e:
+                logging.error(f"Error ingesting {file_row['name']}: {str(e)}", exc_info=True)
+                errors.append(f"{file_row['name']}: {str(e)}")
+                self._update_file(job_id, file_row["position"], status="failed", error=str(e))
+
+        if errors:
+            self._set_job_status(job_id, "failed", error="; ".join(errors))
+        else:
+            self._set_job_status(job_id, "completed")
+            shutil.rmtree(os.path.join(self.queue_directory, job_id), ignore_errors=True)
+        logging.info(f"Ingestion job {job_id} finished with {len(errors)} failed file(s)")
+
+    def _ingest_file(self, job_id: str, file_row: sqlite3.Row) -> bool:
+        """Ingest one staged file in chunk batches; returns False if interrupted."""
+        position = file_row["position"]
+        self._update_file(job_id, position, status="running")
+
+        # Splitting is deterministic, so chunk offsets stay valid across restarts
+        documents = self.doc_processor.load_file(file_row["path"], source_name=file_row["name"])
+        self._update_file(job_id, position, total_chunks=len(documents))
+
+        for start in range(file_row["chunks_done"], len(documents), self.batch_size):
+            if self._stop_event.is_set():
+                self._update_file(job_id, position, status="pending")
+                return False
+            batch = documents[start:start + self.batch_size]
+            ids = [f"{job_id}-{position}-{start + i}" for i in range(len(batch))]
+            self.doc_processor.process_documents(batch, ids=ids)
+            self._update_file(job_id, position, chunks_done=start + len(batch))
+
+        self._update_file(job_id, position, status="completed")
+        if os.path.exists(file_row["path"]):
+            os.remove(file_row["path"])
+        return True
+
+    def _update_file(self, job_id: str, position: int, **fields: Any) -> None:
+        """Checkpoint the given columns of a job file."""
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE job_files SET {assignments} WHERE job_id = ? AND position = ?",
+                (*fields.values(), job_id, position)
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (self._now(), job_id))
+
+    def _set_job_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Record the status of a job."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, self._now(), job_id)
+            )
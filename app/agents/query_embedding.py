@@ -0,0 +1,150 @@
+from typing import List, Dict, Any, Callable, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+import logging
+import threading
+
+EmbedBatch = Callable[[List[str]], List[List[float]]]
+
+
+class QueryEmbedder:
+    """LRU-cached, micro-batched embedding of query text.
+
+    Cache misses are queued. Whenever no batch is being collected, one waiting
+    caller becomes the leader: it waits up to ``max_wait_ms`` for concurrent
+    queries to join, embeds up to ``max_batch_size`` of them in one call, then
+    hands off to the next waiting caller. Identical queries that are already
+    in flight share a single result.
+    """
+
+    def __init__(
+        self,
+        embed_batch: EmbedBatch,
+        cache_size: int = 1024,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """Initialize the embedder around a batch embedding function."""
+        self.embed_batch = embed_batch
+        self.cache_size = cache_size
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        self._batch_condition = threading.Condition()
+        self._pending: List[str] = []
+        self._inflight: Dict[str, Future] = {}
+        self._collecting = False
+        self._batches = 0
+        self._batched_queries = 0
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single query, using the cache when possible."""
+        with self._cache_lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self._hits += 1
+                return list(cached)
+            self._misses += 1
+
+        with self._batch_condition:
+            future = self._inflight.get(text)
+            if future is None:
+                future = Future()
+                self._inflight[text] = future
+                self._pending.append(text)
+                if len(self._pending) >= self.max_batch_size:
+                    self._batch_condition.notify_all()
+
+        while True:
+            with self._batch_condition:
+                while not future.done() and (self._collecting or not self._pending):
+                    self._batch_condition.wait()
+                if future.done():
+                    break
+                self._collecting = True
+            self._run_batch()
+        return list(future.result())
+
+    def _run_batch(self) -> None:
+        """Embed one batch of pending queries, then hand off to the next leader."""
+        texts: List[str] = []
+        futures: List[Future] = []
+        error: BaseException = RuntimeError("Query embedding was interrupted")
+        try:
+            with self._batch_condition:
+                # Give concurrent callers a moment to join the batch
+                self._batch_condition.wait_for(
+                    lambda: len(self._pending) >= self.max_batch_size, timeout=self.max_wait
+                )
+                texts = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+                futures = [self._inflight[text] for text in texts]
+
+            vectors = [tuple(vector) for vector in self.embed_batch(texts)]
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+
+            with self._cache_lock:
+                for text, vector in zip(texts, vectors):
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for future, vector in zip(futures, vectors):
+                future.set_result(vector)
+        except Exception as e:
+            logging.error(f"Error embedding {len(texts)} queries: {str(e)}")
+            error = e
+        finally:
+            # Never leave a caller waiting on a batch that is no longer running
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            with self._batch_condition:
+                for text in texts:
+                    self._inflight.pop(text, None)
+                if texts:
+                    self._batches += 1
+                    self._batched_queries += len(texts)
+                self._collecting = False
+                self._batch_condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache and batching metrics."""
+        with self._cache_lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": len(self._cache),
+                "batches": self._batches,
+                "average_batch_size": self._batched_queries / self._batches if self._batches else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Drop every cached vector."""
+        with self._cache_lock:
+            self._cache.clear()
+
+
+_shared_embedders: Dict[str, QueryEmbedder] = {}
+_shared_embedders_lock = threading.Lock()
+
+
+def shared_query_embedder(model_name: str, embed_batch: EmbedBatch, **kwargs: Any) -> QueryEmbedder:
+    """Process-wide query embedder for ``model_name``.
+
+    Every component embedding queries with the same model shares one cache and
+    one batching queue; ``embed_batch`` is only used for the first caller.
+    """
+    with _shared_embedders_lock:
+        if model_name not in _shared_embedders:
+            _shared_embedders[model_name] = QueryEmbedder(embed_batch, **kwargs)
+        return _shared_embedders[model_name]
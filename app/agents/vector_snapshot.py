@@ -0,0 +1,247 @@
+from typing import List, Dict, Any, Optional, Iterator
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import numpy as np
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "snapshot.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+STRING_COLUMNS = ("ids", "documents", "metadatas")
+
+_store_locks: Dict[str, threading.RLock] = {}
+_store_locks_guard = threading.Lock()
+
+
+def store_lock(persist_directory: str) -> threading.RLock:
+    """Process-wide lock for writes to the store at ``persist_directory``.
+
+    Writers hold it while modifying the store and exports hold it for their
+    whole read, which gives exports a consistent point-in-time view of every
+    write made through this process.
+    """
+    key = os.path.abspath(persist_directory)
+    with _store_locks_guard:
+        return _store_locks.setdefault(key, threading.RLock())
+
+
+class _StringColumnWriter:
+    """Appends optional strings to a blob file while tracking offsets."""
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self.blob = open(os.path.join(directory, f"{name}.bin"), "wb")
+        self.offsets = [0]
+        self.valid: List[bool] = []
+
+    def extend(self, values: List[Optional[str]]) -> None:
+        for value in values:
+            data = value.encode("utf-8") if value is not None else b""
+            self.blob.write(data)
+            self.offsets.append(self.offsets[-1] + len(data))
+            self.valid.append(value is not None)
+
+    def close(self) -> None:
+        self.blob.close()
+        np.save(os.path.join(self.directory, f"{self.name}.offsets.npy"), np.asarray(self.offsets, dtype=np.int64))
+        np.save(os.path.join(self.directory, f"{self.name}.valid.npy"), np.asarray(self.valid, dtype=np.bool_))
+
+
+class _StringColumnReader:
+    """Memory-mapped view of a string column."""
+
+    def __init__(self, directory: str, name: str):
+        blob_path = os.path.join(directory, f"{name}.bin")
+        self.blob = (
+            np.memmap(blob_path, dtype=np.uint8, mode="r")
+            if os.path.getsize(blob_path) else np.empty(0, dtype=np.uint8)
+        )
+        self.offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+        self.valid = np.load(os.path.join(directory, f"{name}.valid.npy"), mmap_mode="r")
+
+    def slice(self, start: int, end: int) -> List[Optional[str]]:
+        return [
+            self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+            if self.valid[i] else None
+            for i in range(start, end)
+        ]
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Read the manifest of the snapshot at ``path``."""
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+    return manifest
+
+
+def check_compatible(collection: Any, path: str, embedding_model: str) -> Dict[str, Any]:
+    """Raise ``ValueError`` unless the snapshot at ``path`` fits ``collection``.
+
+    The snapshot must have been embedded with ``embedding_model`` and, when the
+    collection already holds records, have vectors of the same dimension.
+    """
+    manifest = read_manifest(path)
+    if manifest.get("embedding_model") != embedding_model:
+        raise ValueError(
+            f"Snapshot was embedded with {manifest.get('embedding_model')}, "
+            f"but {embedding_model} is configured"
+        )
+    existing = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if manifest["count"] and existing is not None and len(existing):
+        dimension = len(existing[0])
+        if manifest["dimension"] != dimension:
+            raise ValueError(
+                f"Snapshot vectors have dimension {manifest['dimension']}, "
+                f"but collection {collection.name} uses {dimension}"
+            )
+    return manifest
+
+
+def export_collection(
+    collection: Any,
+    path: str,
+    batch_size: int = 1000,
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Write a snapshot of ``collection`` to the directory ``path``.
+
+    The snapshot is columnar and every file can be memory-mapped:
+
+    - ``snapshot.json``: collection name and metadata, row count, dimension
+    - ``embeddings.npy``: float32 ``(count, dimension)`` array
+    - ``ids``, ``documents``, ``metadatas``: UTF-8 values concatenated into a
+      ``.bin`` file, with ``.offsets.npy`` row boundaries and a ``.valid.npy``
+      mask for missing values. Metadatas are stored as JSON.
+
+    Callers should hold the store's ``store_lock`` so no writes interleave
+    with the export. The snapshot is assembled in a temporary directory and
+    renamed into place, so ``path`` never holds a partial snapshot.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot path already exists: {path}")
+
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        ids = collection.get(include=[])["ids"]
+        count = len(ids)
+        logging.info(f"Exporting {count} records from collection {collection.name}")
+
+        columns = {name: _StringColumnWriter(tmp_path, name) for name in STRING_COLUMNS}
+        embeddings = None
+        dimension = 0
+        row = 0
+        for start in range(0, count, batch_size):
+            batch = collection.get(
+                ids=ids[start:start + batch_size],
+                include=["embeddings", "documents", "metadatas"]
+            )
+            vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+            if embeddings is None:
+                dimension = vectors.shape[1]
+                embeddings = np.lib.format.open_memmap(
+                    os.path.join(tmp_path, EMBEDDINGS_FILE),
+                    mode="w+", dtype=np.float32, shape=(count, dimension)
+                )
+            embeddings[row:row + len(vectors)] = vectors
+            row += len(vectors)
+
+            columns["ids"].extend(batch["ids"])
+            columns["documents"].extend(batch["documents"])
+            columns["metadatas"].extend([
+                json.dumps(metadata) if metadata is not None else None
+                for metadata in batch["metadatas"]
+            ])
+
+        if embeddings is None:
+            np.save(os.path.join(tmp_path, EMBEDDINGS_FILE), np.empty((0, 0), dtype=np.float32))
+        else:
+            embeddings.flush()
+            del embeddings
+        for column in columns.values():
+            column.close()
+
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "collection": collection.name,
+            "collection_metadata": collection.metadata,
+            "count": row,
+            "dimension": dimension,
+            "created_at": datetime.now().isoformat(),
+            **(extra or {}),
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        os.replace(tmp_path, path)
+        logging.info(f"Exported snapshot of {collection.name} to {path}")
+        return manifest
+
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def iter_snapshot(path: str, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Yield batches of ids, embeddings, documents and metadatas from a snapshot."""
+    manifest = read_manifest(path)
+    count = manifest["count"]
+    if not count:
+        return
+
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+    columns = {name: _StringColumnReader(path, name) for name in STRING_COLUMNS}
+    for start in range(0, count, batch_size):
+        end = min(start + batch_size, count)
+        yield {
+            "ids": columns["ids"].slice(start, end),
+            "embeddings": np.array(embeddings[start:end]).tolist(),
+            "documents": columns["documents"].slice(start, end),
+            "metadatas": [
+                json.loads(metadata) if metadata is not None else None
+                for metadata in columns["metadatas"].slice(start, end)
+            ],
+        }
+
+
+def _upsert_groups(batch: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Split a batch into upsert calls Chroma accepts.
+
+    Chroma rejects ``None`` documents and ``None`` or empty metadatas inside
+    a list, so rows are grouped by which columns they have and each group
+    leaves out the columns its rows lack.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for row, (document, metadata) in enumerate(zip(batch["documents"], batch["metadatas"])):
+        groups.setdefault((document is not None, bool(metadata)), []).append(row)
+
+    for (has_document, has_metadata), rows in groups.items():
+        yield {
+            "ids": [batch["ids"][row] for row in rows],
+            "embeddings": [batch["embeddings"][row] for row in rows],
+            "documents": [batch["documents"][row] for row in rows] if has_document else None,
+            "metadatas": [batch["metadatas"][row] for row in rows] if has_metadata else None,
+        }
+
+
+def import_collection(collection: Any, path: str, batch_size: int = 1000) -> int:
+    """Stream a snapshot into ``collection`` without re-embedding.
+
+    Records are upserted, so restoring into a non-empty collection replaces
+    records with matching IDs and keeps the rest.
+    """
+    imported = 0
+    for batch in iter_snapshot(path, batch_size):
+        for group in _upsert_groups(batch):
+            collection.upsert(**group)
+        imported += len(batch["ids"])
+    logging.info(f"Imported {imported} records into collection {collection.name}")
+    return imported
@@ -1,6 +1,12 @@
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+from concurrent.futures import ThreadPoolExecutor
+from app.agents.query_embedding import shared_query_embedder
+from app.agents.vector_snapshot import store_lock, check_compatible, export_collection, import_collection
 import json
+import os
+import shutil
 from typing import Dict, List, Optional, Union
 import logging
 
@@ -8,24 +14,41 @@ class DatabaseManager:
     def __init__(self, persist_directory: str = "./chroma_db"):
         """Initialize the database manager with ChromaDB."""
         self.client = chromadb.PersistentClient(path=persist_directory)
+        self._write_lock = store_lock(persist_directory)
+        # Shared so a query can be embedded once and reused across collections
+        # Chroma's default embedding function runs all-MiniLM-L6-v2 locally
+        self.embedding_model = "all-MiniLM-L6-v2"
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        self.query_embedder = shared_query_embedder(self.embedding_model, self._embed_batch)
         self.content_collection = self.client.get_or_create_collection(
             name="content_plans",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=self.embedding_function
         )
         self.social_collection = self.client.get_or_create_collection(
             name="social_posts",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=self.embedding_function
+        )
+        self.collections = {
+            "content_plans": self.content_collection,
+            "social_posts": self.social_collection,
+        }
+        self._query_executor = ThreadPoolExecutor(
+            max_workers=len(self.collections),
+            thread_name_prefix="db-query"
         )
         logging.info("Database manager initialized with ChromaDB")
 
     def add_content_plan(self, plan_id: str, content: Dict, embeddings: Optional[List[float]] = None) -> None:
         """Add a content plan to the database."""
         try:
-            self.content_collection.add(
-                documents=[json.dumps(content)],
-                metadatas=[{"type": "content_plan"}],
-                ids=[plan_id]
-            )
+            with self._write_lock:
+                self.content_collection.add(
+                    documents=[json.dumps(content)],
+                    metadatas=[{"type": "content_plan"}],
+                    ids=[plan_id]
+                )
             logging.info(f"Added content plan with ID: {plan_id}")
         except Exception as e:
             logging.error(f"Error adding content plan: {str(e)}")
@@ -34,11 +57,12 @@ class DatabaseManager:
     def add_social_post(self, post_id: str, post_data: Dict, embeddings: Optional[List[float]] = None) -> None:
         """Add a social media post to the database."""
         try:
-            self.social_collection.add(
-                documents=[json.dumps(post_data)],
-                metadatas=[{"type": "social_post"}],
-                ids=[post_id]
-            )
+            with self._write_lock:
+                self.social_collection.add(
+                    documents=[json.dumps(post_data)],
+                    metadatas=[{"type": "social_post"}],
+                    ids=[post_id]
+                )
             logging.info(f"Added social post with ID: {post_id}")
         except Exception as e:
             logging.error(f"Error adding social post: {str(e)}")
@@ -66,14 +90,33 @@ class DatabaseManager:
             logging.error(f"Error retrieving social post: {str(e)}")
             return None
 
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the collections' embedding function."""
+        return [[float(value) for value in vector] for vector in self.embedding_function(texts)]
+
+    def _embed_query(self, query_text: str) -> List[float]:
+        """Embed query text through the shared cache and micro-batcher."""
+        return self.query_embedder.embed(query_text)
+
+    def _query_collection(self, name: str, query_embedding: List[float], n_results: int) -> List[Dict]:
+        """Query one collection with a precomputed embedding."""
+        results = self.collections[name].query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            include=["documents", "distances"]
+        )
+        return [
+            {"collection": name, "id": doc_id, "distance": distance, "content": json.loads(doc)}
+            for doc_id, distance, doc in zip(
+                results['ids'][0], results['distances'][0], results['documents'][0]
+            )
+        ]
+
     def query_content_plans(self, query_text: str, n_results: int = 5) -> List[Dict]:
         """Query content plans using text similarity."""
         try:
-            results = self.content_collection.query(
-                query_texts=[query_text],
-                n_results=n_results
-            )
-            return [json.loads(doc) for doc in results['documents'][0]]
+            results = self._query_collection("content_plans", self._embed_query(query_text), n_results)
+            return [result["content"] for result in results]
         except Exception as e:
             logging.error(f"Error querying content plans: {str(e)}")
             return []
@@ -81,22 +124,123 @@ class DatabaseManager:
     def query_social_posts(self, query_text: str, n_results: int = 5) -> List[Dict]:
         """Query social media posts using text similarity."""
         try:
-            results = self.social_collection.query(
-                query_texts=[query_text],
-                n_results=n_results
-            )
-            return [json.loads(doc) for doc in results['documents'][0]]
+            results = self._query_collection("social_posts", self._embed_query(query_text), n_results)
+            return [result["content"] for result in results]
         except Exception as e:
             logging.error(f"Error querying social posts: {str(e)}")
             return []
 
+    def search(
+        self,
+        query_text: str,
+        n_results: int = 10,
+        collections: Optional[List[str]] = None,
+        quotas: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
+        """Search several collections concurrently and merge the results by distance.
+        
+        The query is embedded once and each collection is queried on its own
+        thread. ``quotas`` caps how many results a collection may contribute
+        (defaulting to ``n_results``); a quota of 0 skips the collection.
+        Each result holds the collection name, ID, distance and decoded content.
+        
+        Unlike ``query_*``, which log errors and return an empty list, this
+        raises ``ValueError`` for unknown collection names. A collection whose
+        query fails is logged and left out of the merged results.
+        """
+        names = collections or list(self.collections)
+        quotas = quotas or {}
+        unknown = [name for name in names if name not in self.collections]
+        if unknown:
+            raise ValueError(f"Unknown collections: {', '.join(unknown)}")
+        
+        try:
+            query_embedding = self._embed_query(query_text)
+        except Exception as e:
+            logging.error(f"Error embedding search query: {str(e)}")
+            return []
+        
+        futures = {
+            name: self._query_executor.submit(
+                self._query_collection, name, query_embedding, quotas.get(name, n_results)
+            )
+            for name in names
+            if quotas.get(name, n_results) > 0
+        }
+        
+        merged = []
+        for name, future in futures.items():
+            try:
+                merged.extend(future.result())
+            except Exception as e:
+                # A failing collection should not hide results from the others
+                logging.error(f"Error searching {name}: {str(e)}")
+        
+        merged.sort(key=lambda result: result["distance"])
+        return merged[:n_results]
+
+    def export_snapshot(self, path: str) -> Dict[str, Dict]:
+        """Export a point-in-time snapshot of every collection to ``path``.
+        
+        Collections are staged together and renamed into place at once, so
+        ``path`` never holds a partial snapshot.
+        """
+        if os.path.exists(path):
+            raise FileExistsError(f"Snapshot path already exists: {path}")
+        
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        try:
+            with self._write_lock:
+                manifests = {
+                    name: export_collection(
+                        collection,
+                        os.path.join(tmp_path, name),
+                        extra={"embedding_model": self.embedding_model}
+                    )
+                    for name, collection in self.collections.items()
+                }
+            os.replace(tmp_path, path)
+            logging.info(f"Exported snapshot to {path}")
+            return manifests
+        except Exception as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            logging.error(f"Error exporting snapshot: {str(e)}")
+            raise
+
+    def import_snapshot(self, path: str) -> Dict[str, int]:
+        """Restore collection snapshots from ``path`` without re-embedding.
+        
+        Every collection snapshot is checked before any is imported.
+        """
+        try:
+            snapshots = {
+                name: os.path.join(path, name)
+                for name in self.collections
+                if os.path.isdir(os.path.join(path, name))
+            }
+            with self._write_lock:
+                for name, snapshot_path in snapshots.items():
+                    check_compatible(self.collections[name], snapshot_path, self.embedding_model)
+                imported = {
+                    name: import_collection(self.collections[name], snapshot_path)
+                    for name, snapshot_path in snapshots.items()
+                }
+            logging.info(f"Imported snapshot from {path}: {imported}")
+            return imported
+        except Exception as e:
+            logging.error(f"Error importing snapshot: {str(e)}")
+            raise
+
     def update_content_plan(self, plan_id: str, content: Dict) -> bool:
         """Update an existing content plan."""
         try:
-            self.content_collection.update(
-                documents=[json.dumps(content)],
-                ids=[plan_id]
-            )
+            with self._write_lock:
+                self.content_collection.update(
+                    documents=[json.dumps(content)],
+                    ids=[plan_id]
+                )
             logging.info(f"Updated content plan with ID: {plan_id}")
             return True
         except Exception as e:
@@ -106,10 +250,11 @@ class DatabaseManager:
     def update_social_post(self, post_id: str, post_data: Dict) -> bool:
         """Update an existing social media post."""
         try:
-            self.social_collection.update(
-                documents=[json.dumps(post_data)],
-                ids=[post_id]
-            )
+            with self._write_lock:
+                self.social_collection.update(
+                    documents=[json.dumps(post_data)],
+                    ids=[post_id]
+                )
             logging.info(f"Updated social post with ID: {post_id}")
             return True
         except Exception as e:
@@ -119,7 +264,8 @@ class DatabaseManager:
     def delete_content_plan(self, plan_id: str) -> bool:
         """Delete a content plan by ID."""
         try:
-            self.content_collection.delete(ids=[plan_id])
+            with self._write_lock:
+                self.content_collection.delete(ids=[plan_id])
             logging.info(f"Deleted content plan with ID: {plan_id}")
             return True
         except Exception as e:
@@ -129,7 +275,8 @@ class DatabaseManager:
     def delete_social_post(self, post_id: str) -> bool:
         """Delete a social media post by ID."""
         try:
-            self.social_collection.delete(ids=[post_id])
+            with self._write_lock:
+                self.social_collection.delete(ids=[post_id])
             logging.info(f"Deleted social post with ID: {post_id}")
             return True
         except Exception as e:
@@ -74,11 +74,10 @@ import logging
 from dotenv import load_dotenv
 from app.agents.chat_agent import ChatAgent
 from app.agents.document_processor import DocumentProcessor
+from app.agents.ingestion_queue import IngestionQueue
 from datetime import datetime
 import pandas as pd
-import markdown
 from typing import Dict, List, Any, Optional
-from langchain.schema import Document
 
 # Must be the first Streamlit command
 st.set_page_config(
@@ -111,6 +110,14 @@ def initialize_chat_agent():
         st.error(f"Error initializing chat agent: {str(e)}")
         return None
 
+@st.cache_resource
+def get_ingestion_queue():
+    """Create the process-wide ingestion queue and start its workers."""
+    print("📥 Starting background ingestion workers...")
+    queue = IngestionQueue(DocumentProcessor())
+    queue.start()
+    return queue
+
 # Initialize session state
 if "chat_agent" not in st.session_state:
     print("🤖 Creating new chat agent instance...")
@@ -170,77 +177,62 @@ elif page == "Document Upload":
     st.title("📄 Document Upload")
     st.write("Upload documents to enhance your AI assistant's knowledge.")
     
-    uploaded_files = st.file_uploader(
-        "Upload your documents",
-        accept_multiple_files=True,
-        type=["pdf", "txt", "doc", "docx", "md", "csv", "xlsx", "xls"]
-    )
+    ingestion_queue = get_ingestion_queue()
     
-    if uploaded_files:
-        print("📂 Processing uploaded files...")
-        for uploaded_file in uploaded_files:
-            # Create a unique file ID
-            file_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uploaded_file.name}"
-            file_extension = uploaded_file.name.split('.')[-1].lower()
-            
-            try:
-                print(f"📄 Processing {uploaded_file.name}...")
-                
-                # Handle different file types
-                if file_extension in ['csv', 'xlsx', 'xls']:
-                    if file_extension == 'csv':
-                        df = pd.read_csv(uploaded_file)
-                    else:
-                        df = pd.read_excel(uploaded_file)
-                    # Convert DataFrame to string representation
-                    content = df.to_string()
-                    # Create a Document object
-                    documents = [Document(
-                        page_content=content,
-                        metadata={"source": uploaded_file.name}
-                    )]
-                    print(f"📊 Successfully processed {file_extension.upper()} file: {uploaded_file.name}")
-                
-                elif file_extension == 'md':
-                    content = uploaded_file.read().decode('utf-8')
-                    # Convert Markdown to plain text while preserving structure
-                    content = markdown.markdown(content)
-                    # Create a Document object
-                    documents = [Document(
-                        page_content=content,
-                        metadata={"source": uploaded_file.name}
-                    )]
-                    print(f"📝 Successfully processed Markdown file: {uploaded_file.name}")
-                
-                else:
-                    # Save the file temporarily
-                    with open(file_id, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Process the document using existing logic
-                    documents = st.session_state.doc_processor.load_document(file_id)
-                    # Clean up the temporary file
-                    os.remove(file_id)
-                
-                # Add the processed documents to the chat agent's knowledge base
-                st.session_state.chat_agent.add_documents(documents)
-                print(f"✅ Successfully added {uploaded_file.name} to knowledge base")
-                st.success(f"Successfully processed {uploaded_file.name}")
-                
-            except Exception as e:
-                st.error(f"Error processing {uploaded_file.name}: {str(e)}")
-                print(f"❌ Error processing {uploaded_file.name}: {str(e)}")
-                continue
+    with st.form("upload_form", clear_on_submit=True):
+        uploaded_files = st.file_uploader(
+            "Upload your documents",
+            accept_multiple_files=True,
+            type=["pdf", "txt", "doc", "docx", "md", "csv", "xlsx", "xls"]
+        )
+        submitted = st.form_submit_button("Add to knowledge base")
+    
+    if submitted and uploaded_files:
+        print("📂 Queueing uploaded files...")
+        job_id = ingestion_queue.submit(
+            [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+        )
+        print(f"✅ Queued {len(uploaded_files)} file(s) as job {job_id}")
+        st.success(f"Queued {len(uploaded_files)} file(s) for processing")
+    
+    # Show ingestion progress; jobs live in the queue, so they survive refreshes
+    st.subheader("Ingestion Jobs")
+    st.button("Refresh status")
+    jobs = ingestion_queue.list_jobs(limit=10)
+    if not jobs:
+        st.write("No ingestion jobs yet.")
+    for job in jobs:
+        names = ", ".join(f["name"] for f in job["files"])
+        st.write(f"**{job['status'].capitalize()}** ({job['created_at'][:19]}): {names}")
+        if job["status"] in ("queued", "running"):
+            st.progress(job["progress"])
+        elif job["status"] == "failed":
+            st.error(job["error"])
+            if st.button("Retry", key=f"retry_{job['id']}"):
+                ingestion_queue.retry(job["id"])
+                st.rerun()
+    if st.session_state.chat_agent and any(job["status"] == "completed" for job in jobs):
+        st.session_state.chat_agent.refresh_chain()
     
     # Show document statistics
     with st.expander("Document Statistics"):
-        try:
-            stats = st.session_state.doc_processor.query_documents("", k=1)
-            if stats:
-                st.write(f"Number of documents in knowledge base: {len(stats)}")
-            else:
-                st.write("No documents in knowledge base yet.")
-        except Exception:
+        stats = st.session_state.doc_processor.get_stats()
+        if stats["chunks"]:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Documents", stats["sources"])
+            col2.metric("Chunks", stats["chunks"])
+            col3.metric("Chunk text", f"{stats['chunk_bytes'] / 1024:.1f} KB")
+            st.caption(
+                f"Embedding model: {stats['embedding_model']} · "
+                f"Query cache hit rate: {stats['query_cache']['hit_rate']:.0%}"
+            )
+            st.dataframe(pd.DataFrame(stats["documents"]), hide_index=True)
+            
+            source = st.selectbox("Remove a document", [d["source"] for d in stats["documents"]])
+            if st.button("Remove from knowledge base"):
+                st.session_state.doc_processor.delete_source(source)
+                st.rerun()
+        else:
             st.write("No documents in knowledge base yet.")
             
 print("🎨 Rendering chat interface...")
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Shared test doubles."""
+from typing import Any, Dict, List, Optional
+
+
+class FakeCollection:
+    """In-memory stand-in for the parts of a Chroma collection the app uses."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.metadata = {"hnsw:space": "cosine"}
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        include = ["documents", "metadatas"] if include is None else include
+        selected = [i for i in (list(self.records) if ids is None else ids) if i in self.records]
+        if where:
+            selected = [
+                i for i in selected
+                if all((self.records[i]["metadata"] or {}).get(k) == v for k, v in where.items())
+            ]
+        selected = selected[:limit]
+        # Like Chroma, leave out the columns that were not asked for
+        columns = {"embeddings": "embedding", "documents": "document", "metadatas": "metadata"}
+        return {
+            "ids": selected,
+            **{
+                column: [self.records[i][field] for i in selected] if column in include else None
+                for column, field in columns.items()
+            },
+        }
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]],
+               documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None) -> None:
+        # Mirror Chroma's validation of list entries
+        if documents is not None and any(d is None for d in documents):
+            raise ValueError("Expected each document to be a str")
+        if metadatas is not None and any(not m for m in metadatas):
+            raise ValueError("Expected metadata to be a non-empty dict")
+        for row, record_id in enumerate(ids):
+            self.records[record_id] = {
+                "embedding": embeddings[row],
+                "document": documents[row] if documents else None,
+                "metadata": metadatas[row] if metadatas else None,
+            }
+
+    def delete(self, ids: List[str]) -> None:
+        for i in ids:
+            self.records.pop(i, None)
@@ -0,0 +1,75 @@
+"""Tests for the corpus manifest."""
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.agents.corpus_manifest import CorpusManifest
+
+MODEL = "sentence-transformers/all-mpnet-base-v2"
+
+
+def chunk(source: str, text: str) -> Any:
+    """Minimal stand-in for a LangChain document."""
+    return SimpleNamespace(page_content=text, metadata={"source": source})
+
+
+def test_record_and_remove(tmp_path: Any) -> None:
+    """Totals follow ingests and deletes."""
+    manifest = CorpusManifest(str(tmp_path / "manifest.json"), MODEL)
+    assert not manifest.has_documents()
+
+    manifest.record_ingest([chunk("a.pdf", "abc"), chunk("a.pdf", "de"), chunk("b.txt", "é")])
+    assert manifest.has_documents()
+    assert manifest.stats() == {"sources": 2, "chunks": 3, "chunk_bytes": 7, "embedding_model": MODEL}
+
+    assert manifest.remove_source("a.pdf")
+    assert not manifest.remove_source("a.pdf")
+    assert manifest.stats()["chunks"] == 1
+    assert [entry["source"] for entry in manifest.sources()] == ["b.txt"]
+
+
+def test_instances_share_the_file(tmp_path: Any) -> None:
+    """Writes from one instance are visible to another on the next read."""
+    path = str(tmp_path / "manifest.json")
+    reader = CorpusManifest(path, MODEL)
+    writer = CorpusManifest(path, MODEL)
+
+    writer.record_ingest([chunk("a.pdf", "abc")])
+    assert reader.has_documents()
+
+    writer.rebuild([])
+    assert not reader.has_documents()
+    assert reader.exists()
+
+
+def test_same_size_rewrites_are_detected(tmp_path: Any) -> None:
+    """Back-to-back saves of equal size still invalidate other instances."""
+    path = str(tmp_path / "manifest.json")
+    reader = CorpusManifest(path, MODEL)
+    writer = CorpusManifest(path, MODEL)
+
+    for source in ("a.pdf", "b.pdf", "c.pdf"):
+        writer.rebuild([chunk(source, "abc")])
+        assert [entry["source"] for entry in reader.sources()] == [source]
+
+
+def test_rebuild_saves_once(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Other instances never observe an empty manifest midway through a rebuild."""
+    path = str(tmp_path / "manifest.json")
+    writer = CorpusManifest(path, MODEL)
+    writer.record_ingest([chunk("a.pdf", "abc")])
+    reader = CorpusManifest(path, MODEL)
+
+    seen = []
+    save = CorpusManifest._save
+
+    def observing_save(self: CorpusManifest) -> None:
+        save(self)
+        seen.append(reader.stats()["chunks"])
+
+    monkeypatch.setattr(CorpusManifest, "_save", observing_save)
+    writer.rebuild([chunk("b.pdf", "de"), chunk("b.pdf", "f")])
+
+    assert seen == [2]
+    assert reader.stats() == {"sources": 1, "chunks": 2, "chunk_bytes": 3, "embedding_model": MODEL}
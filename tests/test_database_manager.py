@@ -0,0 +1,163 @@
+"""Tests for DatabaseManager's cross-collection search, with chromadb stubbed out."""
+import importlib
+import json
+import sys
+import types
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+
+from conftest import FakeCollection
+
+
+class QueryCollection(FakeCollection):
+    """Collection returning canned query results, or raising if told to."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.hits: List[tuple] = []
+        self.error: Optional[Exception] = None
+        self.queries: List[Dict[str, Any]] = []
+
+    def get(self, **kwargs: Any) -> Dict[str, Any]:
+        if self.error:
+            raise self.error
+        return super().get(**kwargs)
+
+    def query(self, query_embeddings: List[List[float]], n_results: int,
+              include: List[str]) -> Dict[str, Any]:
+        self.queries.append({"embedding": query_embeddings[0], "n_results": n_results})
+        if self.error:
+            raise self.error
+        hits = sorted(self.hits, key=lambda hit: hit[1])[:n_results]
+        return {
+            "ids": [[hit[0] for hit in hits]],
+            "distances": [[hit[1] for hit in hits]],
+            "documents": [[json.dumps({"id": hit[0]}) for hit in hits]],
+        }
+
+
+class FakeClient:
+    def __init__(self, path: str) -> None:
+        self.collections: Dict[str, QueryCollection] = {}
+
+    def get_or_create_collection(self, name: str, **kwargs: Any) -> QueryCollection:
+        return self.collections.setdefault(name, QueryCollection(name))
+
+
+class FakeEmbeddingFunction:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def manager(monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> Iterator[Any]:
+    """DatabaseManager backed by fake collections.
+    
+    The module built against the fake chromadb is removed again afterwards.
+    """
+    pytest.importorskip("numpy")
+    chromadb = types.ModuleType("chromadb")
+    chromadb.PersistentClient = FakeClient  # type: ignore[attr-defined]
+    config = types.ModuleType("chromadb.config")
+    config.Settings = object  # type: ignore[attr-defined]
+    utils = types.ModuleType("chromadb.utils")
+    utils.embedding_functions = types.SimpleNamespace(  # type: ignore[attr-defined]
+        DefaultEmbeddingFunction=FakeEmbeddingFunction
+    )
+    for name, module in {"chromadb": chromadb, "chromadb.config": config, "chromadb.utils": utils}.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.delitem(sys.modules, "database_manager", raising=False)
+    monkeypatch.setattr("app.agents.query_embedding._shared_embedders", {})
+
+    manager = importlib.import_module("database_manager").DatabaseManager(str(tmp_path))
+    manager.content_collection.hits = [("plan-1", 0.1), ("plan-2", 0.4), ("plan-3", 0.6)]
+    manager.social_collection.hits = [("post-1", 0.2), ("post-2", 0.3)]
+    yield manager
+
+    # monkeypatch only restores what existed before, so drop the stub build here
+    sys.modules.pop("database_manager", None)
+
+
+def test_results_are_merged_by_distance(manager: Any) -> None:
+    """Hits from every collection are interleaved by distance and truncated."""
+    results = manager.search("launch", n_results=4)
+
+    assert [r["id"] for r in results] == ["plan-1", "post-1", "post-2", "plan-2"]
+    assert results[1] == {"collection": "social_posts", "id": "post-1", "distance": 0.2,
+                          "content": {"id": "post-1"}}
+    assert manager.embedding_function.calls == 1
+    assert (manager.content_collection.queries[0]["embedding"]
+            == manager.social_collection.queries[0]["embedding"])
+
+
+def test_quotas_cap_each_collection(manager: Any) -> None:
+    """Quotas limit contributions, and a zero quota skips the collection."""
+    results = manager.search("launch", n_results=5, quotas={"content_plans": 1})
+    assert [r["id"] for r in results] == ["plan-1", "post-1", "post-2"]
+
+    results = manager.search("other", quotas={"social_posts": 0})
+    assert {r["collection"] for r in results} == {"content_plans"}
+    assert len(manager.social_collection.queries) == 1
+
+
+def test_unknown_collection_raises(manager: Any) -> None:
+    """Unknown collection names are a caller error."""
+    with pytest.raises(ValueError, match="newsletters"):
+        manager.search("launch", collections=["content_plans", "newsletters"])
+
+
+def test_failing_collection_is_skipped(manager: Any) -> None:
+    """A failing collection does not hide the others' results."""
+    manager.social_collection.error = RuntimeError("segment unavailable")
+    results = manager.search("launch")
+    assert [r["id"] for r in results] == ["plan-1", "plan-2", "plan-3"]
+
+
+def _fill(manager: Any) -> None:
+    """Store one record in each collection."""
+    for name, collection in manager.collections.items():
+        collection.upsert(ids=[f"{name}-1"], embeddings=[[1.0, 2.0]],
+                          documents=["{}"], metadatas=[{"type": name}])
+
+
+def test_snapshot_round_trip(manager: Any, tmp_path: Any) -> None:
+    """Every collection is exported with the embedding model and restored."""
+    _fill(manager)
+    path = str(tmp_path / "snapshot")
+    manifests = manager.export_snapshot(path)
+    assert {m["embedding_model"] for m in manifests.values()} == {manager.embedding_model}
+
+    records = {name: dict(c.records) for name, c in manager.collections.items()}
+    for collection in manager.collections.values():
+        collection.records.clear()
+    assert manager.import_snapshot(path) == {"content_plans": 1, "social_posts": 1}
+    assert {name: c.records for name, c in manager.collections.items()} == records
+
+
+def test_failed_export_leaves_no_partial_snapshot(manager: Any, tmp_path: Any) -> None:
+    """A failure on a later collection leaves nothing behind at the path."""
+    _fill(manager)
+    manager.social_collection.error = RuntimeError("segment unavailable")
+    path = tmp_path / "snapshot"
+    with pytest.raises(RuntimeError):
+        manager.export_snapshot(str(path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_import_rejects_other_embedding_model(manager: Any, tmp_path: Any) -> None:
+    """Snapshots from a different model are rejected before anything is imported."""
+    _fill(manager)
+    path = str(tmp_path / "snapshot")
+    manager.export_snapshot(path)
+    manager.embedding_model = "other-model"
+    for collection in manager.collections.values():
+        collection.records.clear()
+
+    with pytest.raises(ValueError, match="other-model"):
+        manager.import_snapshot(path)
+    assert all(not c.records for c in manager.collections.values())
@@ -0,0 +1,181 @@
+"""Tests for DocumentProcessor's bookkeeping, with the LangChain stack stubbed out."""
+import importlib
+import os
+import sys
+import types
+from typing import Any, Dict, Iterator, List, Optional
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import FakeCollection
+
+
+class FakeDocument:
+    """Stand-in for ``langchain.schema.Document``."""
+
+    def __init__(self, page_content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+
+class FakeChroma:
+    """Chroma wrapper around an in-memory collection per persist directory."""
+
+    stores: Dict[str, FakeCollection] = {}
+
+    def __init__(self, persist_directory: str, embedding_function: Any = None) -> None:
+        self._collection = self.stores.setdefault(persist_directory, FakeCollection("langchain"))
+        # Chroma creates its database as soon as the store is opened
+        open(os.path.join(persist_directory, "chroma.sqlite3"), "a").close()
+
+    @classmethod
+    def from_documents(cls, documents: List[FakeDocument], embedding: Any,
+                       ids: Optional[List[str]] = None, persist_directory: str = "") -> "FakeChroma":
+        store = cls(persist_directory)
+        start = len(store._collection.records)
+        store._collection.upsert(
+            ids=ids or [f"auto-{start + i}" for i in range(len(documents))],
+            embeddings=embedding.embed_documents([doc.page_content for doc in documents]),
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+        )
+        return store
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self._collection.get(ids=ids, where=where, include=include)
+
+    def delete(self, ids: List[str]) -> None:
+        self._collection.delete(ids)
+
+
+class FakeSentenceTransformer:
+    """Records the keyword arguments every encode call was made with."""
+
+    def __init__(self) -> None:
+        self.calls: List[Dict[str, Any]] = []
+
+    def encode(self, texts: List[str], **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        return np.array([[float(len(t))] for t in texts])
+
+
+def _module(name: str, **attrs: Any) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+@pytest.fixture
+def processor_class(monkeypatch: pytest.MonkeyPatch) -> Iterator[Any]:
+    """DocumentProcessor imported against stub LangChain modules.
+    
+    The stub-built module is removed again afterwards, so later imports get
+    the real one.
+    """
+    stub = type("Stub", (), {"__init__": lambda self, *args, **kwargs: None})
+    embeddings = type("FakeEmbeddings", (), {
+        "__init__": lambda self, *args, **kwargs: None,
+        "embed_documents": lambda self, texts: [[float(len(t))] for t in texts],
+        "client": FakeSentenceTransformer(),
+        "encode_kwargs": {},
+        "query_encode_kwargs": {"prompt": "query: "},
+    })
+    stubs = {
+        "langchain": _module("langchain"),
+        "langchain.text_splitter": _module("langchain.text_splitter", RecursiveCharacterTextSplitter=stub),
+        "langchain.schema": _module("langchain.schema", Document=FakeDocument),
+        "langchain_huggingface": _module("langchain_huggingface", HuggingFaceEmbeddings=embeddings),
+        "langchain_chroma": _module("langchain_chroma", Chroma=FakeChroma),
+        "langchain_core": _module("langchain_core"),
+        "langchain_core.embeddings": _module("langchain_core.embeddings", Embeddings=object),
+        "langchain_community": _module("langchain_community"),
+        "langchain_community.document_loaders": _module(
+            "langchain_community.document_loaders",
+            PyPDFLoader=stub, TextLoader=stub,
+            UnstructuredWordDocumentLoader=stub, UnstructuredFileLoader=stub,
+        ),
+        "markdown": _module("markdown"),
+        "pandas": _module("pandas"),
+    }
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    package = importlib.import_module("app.agents")
+    monkeypatch.delitem(sys.modules, "app.agents.document_processor", raising=False)
+    monkeypatch.delattr(package, "document_processor", raising=False)
+    monkeypatch.setattr(FakeChroma, "stores", {})
+    monkeypatch.setattr("app.agents.query_embedding._shared_embedders", {})
+
+    yield importlib.import_module("app.agents.document_processor").DocumentProcessor
+
+    # monkeypatch only restores what existed before, so drop the stub build here
+    sys.modules.pop("app.agents.document_processor", None)
+    if hasattr(package, "document_processor"):
+        delattr(package, "document_processor")
+
+
+def test_replayed_batch_is_counted_once(tmp_path: Any, processor_class: Any) -> None:
+    """Re-adding chunks with the same IDs leaves the manifest totals unchanged."""
+    processor = processor_class(persist_directory=str(tmp_path))
+    batch = [FakeDocument("abc", {"source": "a.pdf"}), FakeDocument("de", {"source": "a.pdf"})]
+
+    processor.process_documents(batch, ids=["job-0-0", "job-0-1"])
+    before = processor.get_stats()
+    processor.process_documents(batch, ids=["job-0-0", "job-0-1"])
+    after = processor.get_stats()
+
+    assert (after["chunks"], after["chunk_bytes"]) == (before["chunks"], before["chunk_bytes"]) == (2, 5)
+
+    processor.process_documents(batch[:1] + [FakeDocument("fgh", {"source": "a.pdf"})],
+                                ids=["job-0-0", "job-0-2"])
+    assert processor.get_stats()["chunks"] == 3
+
+
+def test_delete_source_updates_manifest(tmp_path: Any, processor_class: Any) -> None:
+    """Deleting a source removes its chunks from the index and the manifest."""
+    processor = processor_class(persist_directory=str(tmp_path))
+    processor.process_documents([FakeDocument("abc", {"source": "a.pdf"})])
+
+    assert processor.has_documents()
+    assert processor.delete_source("a.pdf")
+    assert not processor.has_documents()
+
+
+def test_snapshot_round_trip(tmp_path: Any, processor_class: Any) -> None:
+    """A snapshot restores the chunks and the manifest into an empty store."""
+    processor = processor_class(persist_directory=str(tmp_path / "source"))
+    processor.process_documents([FakeDocument("abc", {"source": "a.pdf"}),
+                                 FakeDocument("de", {"source": "b.pdf"})])
+    path = str(tmp_path / "snapshot")
+    assert processor.export_snapshot(path)["count"] == 2
+
+    restored = processor_class(persist_directory=str(tmp_path / "restored"))
+    assert not restored.has_documents()
+    assert restored.import_snapshot(path) == 2
+    assert restored.get_vectorstore()._collection.records == processor.get_vectorstore()._collection.records
+    stats = restored.get_stats()
+    assert (stats["sources"], stats["chunks"], stats["chunk_bytes"]) == (2, 2, 5)
+
+
+def test_import_reports_manifest_failure(tmp_path: Any, processor_class: Any,
+                                         monkeypatch: pytest.MonkeyPatch) -> None:
+    """A manifest that cannot be rebuilt after an import is an error for the caller."""
+    processor = processor_class(persist_directory=str(tmp_path / "source"))
+    processor.process_documents([FakeDocument("abc", {"source": "a.pdf"})])
+    path = str(tmp_path / "snapshot")
+    processor.export_snapshot(path)
+
+    restored = processor_class(persist_directory=str(tmp_path / "restored"))
+    monkeypatch.setattr(restored.manifest, "rebuild", lambda *args, **kwargs: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        restored.import_snapshot(path)
+
+
+def test_queries_are_embedded_as_queries(tmp_path: Any, processor_class: Any) -> None:
+    """Batched query embedding uses the model's query settings, not the document ones."""
+    processor = processor_class(persist_directory=str(tmp_path))
+
+    assert processor.query_embeddings.embed_query("two\nlines") == [9.0]
+    assert processor.embeddings.client.calls == [{"prompt": "query: "}]
@@ -0,0 +1,160 @@
+"""Tests for the background ingestion queue."""
+import sqlite3
+import time
+from typing import Any, List, Optional
+
+import pytest
+
+from app.agents.ingestion_queue import IngestionQueue
+
+
+class FakeProcessor:
+    """Splits staged files into one chunk per line and records stored IDs."""
+
+    def __init__(self, fail_on_call: Optional[int] = None) -> None:
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+        self.stored_ids: List[str] = []
+
+    def load_file(self, file_path: str, source_name: Optional[str] = None) -> List[Any]:
+        with open(file_path) as f:
+            return f.read().splitlines()
+
+    def process_documents(self, documents: List[Any], ids: Optional[List[str]] = None) -> None:
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("embedding backend unavailable")
+        self.stored_ids.extend(ids or [])
+
+
+def wait_for(queue: IngestionQueue, job_id: str, timeout: float = 5.0) -> dict:
+    """Poll the status API until the job leaves the queued/running states."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get_job(job_id)
+        if job and job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def lines() -> bytes:
+    return "\n".join(f"line {i}" for i in range(5)).encode()
+
+
+def test_job_completes_in_batches(tmp_path: Any, lines: bytes) -> None:
+    """Files are stored in chunk batches and reported as completed."""
+    processor = FakeProcessor()
+    queue = IngestionQueue(processor, str(tmp_path), batch_size=2, poll_interval=0.01)
+    job_id = queue.submit([("a.txt", lines), ("b.txt", lines)])
+    queue.start()
+    try:
+        job = wait_for(queue, job_id)
+    finally:
+        queue.stop()
+
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert processor.calls == 6
+    assert len(set(processor.stored_ids)) == 10
+    assert not (tmp_path / job_id).exists()
+
+
+def test_failed_job_resumes_from_checkpoint(tmp_path: Any, lines: bytes) -> None:
+    """Retrying a failed job only stores the batches that were not checkpointed."""
+    processor = FakeProcessor(fail_on_call=2)
+    queue = IngestionQueue(processor, str(tmp_path), batch_size=2, poll_interval=0.01)
+    job_id = queue.submit([("a.txt", lines)])
+    queue.start()
+    try:
+        job = wait_for(queue, job_id)
+        assert job["status"] == "failed"
+        assert job["files"][0]["chunks_done"] == 2
+        assert processor.stored_ids == [f"{job_id}-0-0", f"{job_id}-0-1"]
+
+        assert queue.retry(job_id)
+        job = wait_for(queue, job_id)
+    finally:
+        queue.stop()
+
+    assert job["status"] == "completed"
+    assert processor.stored_ids == [f"{job_id}-0-{i}" for i in range(5)]
+
+
+def test_abandoned_job_is_taken_over(tmp_path: Any, lines: bytes) -> None:
+    """Jobs whose owner stopped sending heartbeats are picked up by another queue."""
+    crashed = IngestionQueue(FakeProcessor(), str(tmp_path))
+    job_id = crashed.submit([("a.txt", lines)])
+    assert crashed._claim_next() == job_id
+    with sqlite3.connect(crashed.db_path) as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 120,))
+
+    processor = FakeProcessor()
+    queue = IngestionQueue(processor, str(tmp_path), batch_size=2, poll_interval=0.01)
+    queue.start()
+    try:
+        job = wait_for(queue, job_id)
+    finally:
+        queue.stop()
+
+    assert job["status"] == "completed"
+    assert len(processor.stored_ids) == 5
+
+
+def test_live_job_is_not_taken_over(tmp_path: Any, lines: bytes) -> None:
+    """A running job with a fresh heartbeat belongs to its current owner."""
+    owner = IngestionQueue(FakeProcessor(), str(tmp_path))
+    job_id = owner.submit([("a.txt", lines)])
+    assert owner._claim_next() == job_id
+
+    other = IngestionQueue(FakeProcessor(), str(tmp_path))
+    assert other._claim_next() is None
+
+
+def test_job_error_outside_file_handler_fails_job(tmp_path: Any, lines: bytes) -> None:
+    """Errors escaping a job mark it failed instead of killing the worker."""
+    queue = IngestionQueue(FakeProcessor(), str(tmp_path), poll_interval=0.01)
+    calls = []
+
+    def broken_run_job(job_id: str) -> None:
+        calls.append(job_id)
+        raise sqlite3.OperationalError("database is locked")
+
+    queue._run_job = broken_run_job  # type: ignore[method-assign]
+    first = queue.submit([("a.txt", lines)])
+    second = queue.submit([("b.txt", lines)])
+    queue.start()
+    try:
+        assert wait_for(queue, first)["error"] == "database is locked"
+        assert wait_for(queue, second)["status"] == "failed"
+    finally:
+        queue.stop()
+
+    assert calls == [first, second]
+
+
+def test_connections_are_closed(tmp_path: Any, lines: bytes, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Every queue operation closes the connection it opened."""
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args: Any, **kwargs: Any) -> sqlite3.Connection:
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+    queue = IngestionQueue(FakeProcessor(), str(tmp_path), batch_size=2, poll_interval=0.01)
+    job_id = queue.submit([("a.txt", lines)])
+    queue.start()
+    try:
+        wait_for(queue, job_id)
+    finally:
+        queue.stop()
+    queue.list_jobs()
+
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,125 @@
+"""Tests for the query embedding cache and micro-batcher."""
+import threading
+import time
+from typing import List
+
+import pytest
+
+from app.agents.query_embedding import QueryEmbedder
+
+
+class RecordingModel:
+    """Fake model that records every batch it is asked to embed."""
+
+    def __init__(self) -> None:
+        self.batches: List[List[str]] = []
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_cache_hits_and_eviction() -> None:
+    """Repeated queries are served from the LRU without calling the model."""
+    model = RecordingModel()
+    embedder = QueryEmbedder(model, cache_size=2, max_wait_ms=0)
+
+    assert embedder.embed("abc") == [3.0, 1.0]
+    assert embedder.embed("abc") == [3.0, 1.0]
+    embedder.embed("de")
+    embedder.embed("f")  # evicts "abc"
+    embedder.embed("abc")
+
+    assert model.batches == [["abc"], ["de"], ["f"], ["abc"]]
+    stats = embedder.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 4, 2)
+
+
+def test_concurrent_queries_share_a_batch() -> None:
+    """Queries arriving within the wait window are embedded in one call."""
+    model = RecordingModel()
+    embedder = QueryEmbedder(model, max_batch_size=3, max_wait_ms=1000)
+    texts = ["a", "bb", "ccc", "bb"]
+    results = {}
+
+    def run(text: str) -> None:
+        results[text] = embedder.embed(text)
+
+    threads = [threading.Thread(target=run, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {"a": [1.0, 1.0], "bb": [2.0, 1.0], "ccc": [3.0, 1.0]}
+    assert sum(len(batch) for batch in model.batches) == 3
+    assert len(model.batches) < 3
+
+
+def test_errors_reach_every_caller() -> None:
+    """A failing model call raises for the query and is not cached."""
+    def failing(texts: List[str]) -> List[List[float]]:
+        raise RuntimeError("model unavailable")
+
+    embedder = QueryEmbedder(failing, max_wait_ms=0)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            embedder.embed("abc")
+    assert embedder.stats()["size"] == 0
+
+
+def test_leader_returns_while_queries_keep_arriving() -> None:
+    """The first caller gets its result without draining everyone else's queries."""
+    stop = threading.Event()
+
+    def slow_model(texts: List[str]) -> List[List[float]]:
+        time.sleep(0.02)
+        return [[float(len(text))] for text in texts]
+
+    embedder = QueryEmbedder(slow_model, max_batch_size=1, max_wait_ms=0)
+    leader_done = threading.Event()
+
+    def leader() -> None:
+        embedder.embed("leader")
+        leader_done.set()
+
+    def spammer(worker: int) -> None:
+        i = 0
+        while not stop.is_set():
+            embedder.embed(f"query-{worker}-{i}")
+            i += 1
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    spammers = [threading.Thread(target=spammer, args=(worker,)) for worker in range(4)]
+    for thread in spammers:
+        thread.start()
+    try:
+        assert leader_done.wait(1.0)
+    finally:
+        stop.set()
+        for thread in [leader_thread, *spammers]:
+            thread.join(5)
+    assert not any(thread.is_alive() for thread in spammers)
+
+
+def test_short_model_output_fails_callers_without_hanging() -> None:
+    """A model returning too few vectors fails the batch and frees the queue."""
+    outputs = [[[1.0]], [[2.0]]]
+    embedder = QueryEmbedder(lambda texts: outputs.pop(0), max_batch_size=2, max_wait_ms=200)
+    errors = []
+
+    def run(text: str) -> None:
+        try:
+            embedder.embed(text)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=run, args=(text,)) for text in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ["Expected 2 embeddings, got 1"] * 2
+    assert embedder.embed("c") == [2.0]
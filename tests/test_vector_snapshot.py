@@ -0,0 +1,78 @@
+"""Tests for vector store snapshots."""
+from typing import Any
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import FakeCollection
+
+from app.agents.vector_snapshot import (
+    check_compatible,
+    export_collection,
+    import_collection,
+    read_manifest,
+)
+
+
+@pytest.fixture
+def collection() -> FakeCollection:
+    """Collection with unicode text and a mix of missing documents and metadatas."""
+    collection = FakeCollection("content_plans")
+    documents = ["plan", "café ☕", None, "", "last"]
+    metadatas = [{"type": "content_plan", "n": 0}, None, {"n": 2}, {"n": 3}, None]
+    for i in range(5):
+        collection.upsert(
+            ids=[f"id-{i}"],
+            embeddings=[[float(i), 0.5, -1.0]],
+            documents=[documents[i]] if documents[i] is not None else None,
+            metadatas=[metadatas[i]] if metadatas[i] is not None else None,
+        )
+    return collection
+
+
+def test_round_trip(tmp_path: Any, collection: FakeCollection) -> None:
+    """Records survive export and import without re-embedding."""
+    path = str(tmp_path / "snapshot")
+    manifest = export_collection(collection, path, batch_size=2, extra={"embedding_model": "test"})
+    assert manifest["count"] == 5
+    assert manifest["dimension"] == 3
+    assert read_manifest(path)["embedding_model"] == "test"
+
+    embeddings = np.load(f"{path}/embeddings.npy", mmap_mode="r")
+    assert embeddings.dtype == np.float32
+    assert embeddings.shape == (5, 3)
+
+    restored = FakeCollection("content_plans")
+    assert import_collection(restored, path, batch_size=3) == 5
+    assert restored.records == collection.records
+
+
+def test_export_refuses_existing_path(tmp_path: Any, collection: FakeCollection) -> None:
+    """An existing snapshot is never overwritten."""
+    path = str(tmp_path / "snapshot")
+    export_collection(collection, path)
+    with pytest.raises(FileExistsError):
+        export_collection(collection, path)
+
+
+def test_empty_collection(tmp_path: Any) -> None:
+    """Empty collections produce an importable snapshot."""
+    path = str(tmp_path / "snapshot")
+    assert export_collection(FakeCollection("empty"), path)["count"] == 0
+    assert import_collection(FakeCollection("empty"), path) == 0
+
+
+def test_check_compatible(tmp_path: Any, collection: FakeCollection) -> None:
+    """Snapshots from another model or with other dimensions are rejected."""
+    path = str(tmp_path / "snapshot")
+    export_collection(collection, path, extra={"embedding_model": "test"})
+
+    assert check_compatible(FakeCollection("empty"), path, "test")["count"] == 5
+    with pytest.raises(ValueError, match="embedded with test"):
+        check_compatible(collection, path, "other-model")
+
+    narrower = FakeCollection("narrower")
+    narrower.upsert(ids=["x"], embeddings=[[1.0, 2.0]])
+    with pytest.raises(ValueError, match="dimension 3"):
+        check_compatible(narrower, path, "test")